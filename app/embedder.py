@@ -74,6 +74,16 @@ def embed_query(query: str, model: SentenceTransformer) -> np.ndarray:
     return vector
 
 
+def embed_queries(queries: List[str], model: SentenceTransformer, batch_size: int = 256) -> np.ndarray:
+    """
+    Embed many queries in one encode call and return a normalized (n, dim) matrix for FAISS.
+    """
+    vectors = model.encode(queries, batch_size=batch_size, show_progress_bar=False)
+    vectors = np.array(vectors).astype("float32").reshape(len(queries), -1)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
 def save_embeddings_json(embedded_chunks: List[Dict], file_path: str):
     """
     Save embedded vectors + metadata as JSON for persistent retrieval.
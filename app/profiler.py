@@ -0,0 +1,402 @@
+from typing import Dict, List, Optional, Literal
+from collections import Counter
+import tracemalloc
+import threading
+import cProfile
+import marshal
+import pstats
+import time
+import sys
+import os
+
+PROFILE_MODES = ("cprofile", "sampling")
+TRACEMALLOC_FRAMES = 10
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RequestProfiler:
+    """
+    On-demand profiler for live requests.
+
+    A session is armed for the next N requests or for a time window, then
+    finishes on its own and keeps the result until the next session starts.
+    While idle, the only cost per request is reading `self.active`.
+
+    Modes:
+        cprofile: deterministic cProfile of the event-loop thread, which is
+            where `async def` route handlers (/embed, /search) run. Work that
+            Starlette moves to its threadpool (sync routes, sync generators
+            behind StreamingResponse such as /search/batch) is not captured.
+        sampling: a background thread samples every thread's stack at a
+            fixed interval, threadpool included; exported as
+            flamegraph-compatible collapsed stacks. Only stacks that pass
+            through this project's code are kept, which drops idle
+            threadpool workers and the event loop waiting in select().
+    """
+
+    def __init__(self):
+        self.active = False
+        self._lock = threading.Lock()
+        self._session: Optional[Dict] = None
+        self._result: Optional[Dict] = None
+
+    # ------------------------------------
+    # Session control
+    # ------------------------------------
+    def start(
+        self,
+        mode: Literal["cprofile", "sampling"] = "cprofile",
+        requests: Optional[int] = None,
+        seconds: Optional[float] = None,
+        trace_malloc: bool = False,
+        top: int = 25,
+        interval: float = 0.005
+    ) -> Dict:
+        """
+        Arm a profiling session. Exactly one of `requests` or `seconds` is required.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Invalid profile mode: {mode}")
+        if (requests is None) == (seconds is None):
+            raise ValueError("Specify exactly one of 'requests' or 'seconds'.")
+        if requests is not None and requests < 1:
+            raise ValueError("'requests' must be at least 1.")
+        if seconds is not None and seconds <= 0:
+            raise ValueError("'seconds' must be positive.")
+        if isinstance(top, bool) or not isinstance(top, int) or top < 1:
+            raise ValueError("'top' must be an integer of at least 1.")
+        if not isinstance(trace_malloc, bool):
+            raise ValueError("'tracemalloc' must be true or false.")
+
+        with self._lock:
+            if self.active:
+                raise RuntimeError("A profiling session is already running.")
+
+            session = {
+                "mode": mode,
+                "max_requests": requests,
+                "deadline": time.monotonic() + seconds if seconds else None,
+                "seconds": seconds,
+                "top": top,
+                "interval": interval,
+                "requests_seen": 0,
+                "in_flight": 0,
+                "started_at": time.time(),
+                "started": time.monotonic(),
+                "profile": cProfile.Profile() if mode == "cprofile" else None,
+                "profile_enabled": False,
+                "stacks": Counter(),
+                "sampler": None,
+                "stop_sampling": threading.Event(),
+                "trace_malloc": trace_malloc,
+                "owns_tracemalloc": False,
+                "malloc_baseline": None,
+                "malloc_peak": 0,
+            }
+
+            if trace_malloc:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(TRACEMALLOC_FRAMES)
+                    session["owns_tracemalloc"] = True
+                session["malloc_baseline"] = tracemalloc.take_snapshot()
+
+            if mode == "sampling":
+                sampler = threading.Thread(
+                    target=self._sample_loop, args=(session,), name="neurona-profiler", daemon=True
+                )
+                session["sampler"] = sampler
+                sampler.start()
+
+            self._session = session
+            self._result = None
+            self.active = True
+
+        print(f"🩺 Profiling armed ({mode}, {f'{requests} requests' if requests else f'{seconds}s'})")
+        return self.status()
+
+    def stop(self) -> Optional[Dict]:
+        """
+        Finish the running session now (if any) and return its summary.
+        """
+        with self._lock:
+            if self.active:
+                self._finish()
+        return self.summary()
+
+    def status(self) -> Dict:
+        self._check_deadline()
+        session = self._session
+        status = {"active": self.active, "has_result": self._result is not None}
+        if session is not None:
+            status.update({
+                "mode": session["mode"],
+                "requests_seen": session["requests_seen"],
+                "max_requests": session["max_requests"],
+                "seconds": session["seconds"],
+                "elapsed": round(time.monotonic() - session["started"], 3),
+            })
+        return status
+
+    # ------------------------------------
+    # Request hooks (event-loop thread)
+    # ------------------------------------
+    def before_request(self) -> Optional[Dict]:
+        """
+        Register a request with the running session and return that session.
+        Returns None if no session is accepting requests, in which case
+        after_request must not be called.
+        """
+        with self._lock:
+            session = self._session
+            if not self.active or self._expired(session):
+                if self.active:
+                    self._finish()
+                return None
+            if session["max_requests"] is not None and session["requests_seen"] >= session["max_requests"]:
+                return None
+
+            session["requests_seen"] += 1
+            session["in_flight"] += 1
+            if session["profile"] is not None and not session["profile_enabled"]:
+                session["profile"].enable()
+                session["profile_enabled"] = True
+            if session["trace_malloc"] and session["in_flight"] == 1:
+                tracemalloc.reset_peak()
+            return session
+
+    def after_request(self, session: Dict):
+        """
+        Complete a request for the session returned by before_request.
+        Completions for a session that already finished are ignored.
+        """
+        with self._lock:
+            session["in_flight"] -= 1
+            if session is not self._session or not self.active:
+                return
+            if session["trace_malloc"] and tracemalloc.is_tracing():
+                session["malloc_peak"] = max(session["malloc_peak"], tracemalloc.get_traced_memory()[1])
+            done = (
+                session["max_requests"] is not None
+                and session["requests_seen"] >= session["max_requests"]
+                and session["in_flight"] == 0
+            )
+            if done or self._expired(session):
+                self._finish()
+
+    # ------------------------------------
+    # Results
+    # ------------------------------------
+    def summary(self) -> Optional[Dict]:
+        """
+        JSON-friendly summary of the last finished session.
+        """
+        self._check_deadline()
+        if self._result is None:
+            return None
+        return {k: v for k, v in self._result.items() if k not in ("pstats", "collapsed")}
+
+    def export(self, fmt: Literal["json", "pstats", "collapsed"] = "json"):
+        """
+        Return the last result as a summary dict, marshalled pstats bytes, or
+        collapsed-stack text (one 'frame;frame;frame count' line per stack).
+        """
+        self._check_deadline()
+        if self._result is None:
+            raise LookupError("No profiling result available.")
+        if fmt == "json":
+            return self.summary()
+        if fmt == "pstats":
+            if self._result["pstats"] is None:
+                raise ValueError("pstats output requires mode 'cprofile'.")
+            return self._result["pstats"]
+        if fmt == "collapsed":
+            if self._result["collapsed"] is None:
+                raise ValueError("Collapsed stacks require mode 'sampling'.")
+            return self._result["collapsed"]
+        raise ValueError(f"Invalid export format: {fmt}")
+
+    # ------------------------------------
+    # Internals
+    # ------------------------------------
+    def _expired(self, session: Optional[Dict]) -> bool:
+        return bool(session and session["deadline"] is not None and time.monotonic() >= session["deadline"])
+
+    def _check_deadline(self):
+        if self.active and self._expired(self._session):
+            with self._lock:
+                if self.active:
+                    self._finish()
+
+    def _finish(self):
+        """
+        Stop collection and build the result. Caller holds self._lock.
+
+        cProfile hooks the thread that enabled it, so this must run on the
+        event-loop thread when mode is 'cprofile' (route handlers and the
+        middleware both do).
+        """
+        session = self._session
+        self.active = False
+
+        if session["profile_enabled"]:
+            session["profile"].disable()
+        if session["sampler"] is not None:
+            session["stop_sampling"].set()
+            session["sampler"].join(timeout=1)
+
+        # Snapshot before building stats so the profiler's own work isn't counted.
+        snapshot = None
+        if session["trace_malloc"] and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            if session["owns_tracemalloc"]:
+                tracemalloc.stop()
+
+        result = {
+            "mode": session["mode"],
+            "started_at": session["started_at"],
+            "duration": round(time.monotonic() - session["started"], 3),
+            "requests": session["requests_seen"],
+            "pstats": None,
+            "collapsed": None,
+            "top_functions": [],
+            "top_allocations": [],
+        }
+
+        if session["profile"] is not None and session["profile_enabled"]:
+            profile = session["profile"]
+            profile.create_stats()
+            result["pstats"] = marshal.dumps(profile.stats)
+            result["top_functions"] = _top_functions(profile, session["top"])
+
+        if session["mode"] == "sampling":
+            stacks = session["stacks"]
+            result["collapsed"] = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+            result["samples"] = sum(stacks.values())
+
+        if snapshot is not None:
+            baseline = session["malloc_baseline"]
+            result["top_allocations"] = _top_allocations(snapshot, baseline, session["top"])
+            result["peak_traced_kb"] = round(session["malloc_peak"] / 1024, 1)
+
+        self._result = result
+        print(f"🩺 Profiling finished after {result['requests']} requests in {result['duration']}s")
+
+    def _sample_loop(self, session: Dict):
+        own_id = threading.get_ident()
+        stop = session["stop_sampling"]
+        while not stop.wait(session["interval"]):
+            if self._expired(session):
+                break
+            if session["in_flight"] <= 0:
+                continue
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = _collapse(frame)
+                if stack is not None:
+                    session["stacks"][stack] += 1
+
+
+def _is_project_file(filename: str) -> bool:
+    """True for this project's own sources (not the profiler, not a venv inside the repo)."""
+    return (
+        filename.startswith(_PROJECT_ROOT)
+        and filename != __file__
+        and "site-packages" not in filename
+        and "dist-packages" not in filename
+    )
+
+
+def _collapse(frame) -> Optional[str]:
+    """
+    Render a frame chain root-first as 'file:func;file:func;...', or None if
+    no frame belongs to this project (an idle or unrelated thread).
+    """
+    names = []
+    in_project = False
+    while frame is not None:
+        code = frame.f_code
+        if _is_project_file(code.co_filename):
+            in_project = True
+        names.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names)) if in_project else None
+
+
+def _top_functions(profile: cProfile.Profile, top: int) -> List[Dict]:
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in profile.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({func})",
+            "calls": nc,
+            "total_time": round(tt, 6),
+            "cumulative_time": round(ct, 6),
+        })
+    rows.sort(key=lambda r: r["cumulative_time"], reverse=True)
+    return rows[:top]
+
+
+def _top_allocations(snapshot: tracemalloc.Snapshot, baseline: tracemalloc.Snapshot, top: int) -> List[Dict]:
+    """
+    Allocation sites that grew during the session, largest first.
+
+    `site` is the allocating line; `caller` is the innermost frame in this
+    project, which points at app code when the allocation happened in a library.
+    """
+    noise = [
+        tracemalloc.Filter(False, path)
+        for path in (tracemalloc.__file__, cProfile.__file__, pstats.__file__, __file__)
+    ]
+    snapshot = snapshot.filter_traces(noise)
+    baseline = baseline.filter_traces(noise)
+
+    rows = []
+    for stat in snapshot.compare_to(baseline, "traceback"):
+        if len(rows) >= top:
+            break
+        if stat.size_diff <= 0:
+            continue
+        frames = list(stat.traceback)  # oldest -> most recent
+        caller = next(
+            (f for f in reversed(frames) if _is_project_file(f.filename)),
+            None
+        )
+        rows.append({
+            "site": f"{frames[-1].filename}:{frames[-1].lineno}",
+            "caller": f"{caller.filename}:{caller.lineno}" if caller else None,
+            "size_diff_kb": round(stat.size_diff / 1024, 1),
+            "count_diff": stat.count_diff,
+        })
+    return rows
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware that reports requests to a RequestProfiler.
+
+    When no session is active it adds a single attribute check per request.
+    Paths under `skip_prefix` (the admin routes themselves) are never profiled.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler, skip_prefix: str = "/admin"):
+        self.app = app
+        self.profiler = profiler
+        self.skip_prefix = skip_prefix
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not self.profiler.active
+            or scope["type"] != "http"
+            or scope["path"].startswith(self.skip_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        session = self.profiler.before_request()
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.after_request(session)
@@ -1,10 +1,11 @@
 from app.vector_store import (
     load_embeddings_json,
     create_faiss_index,
-    search_faiss
+    search_faiss,
+    search_faiss_batch
 )
-from app.embedder import load_model, embed_query
-from typing import List, Dict, Optional
+from app.embedder import load_model, embed_query, embed_queries
+from typing import List, Dict, Optional, Iterator
 import os
 
 
@@ -49,6 +50,47 @@ class NeuronaSearchEngine:
 
         return results
 
+    def iter_search_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        batch_size: int = 512,
+        filter_fn: Optional[callable] = None
+    ) -> Iterator[List[Dict]]:
+        """
+        Yield one result list per query, in input order.
+        Queries are encoded and searched `batch_size` at a time, so each batch costs
+        one model.encode and one index.search, and early results are available
+        before later batches are processed.
+        """
+        if any(not q or not q.strip() for q in queries):
+            raise ValueError("Queries must not be empty.")
+
+        # FAISS allocates len(batch) x top_k scores/ids; never ask for more than exist
+        top_k = min(top_k, self.index.ntotal)
+
+        print(f"🔍 Batch searching top {top_k} matches for {len(queries)} queries")
+        for start in range(0, len(queries), batch_size):
+            batch = queries[start:start + batch_size]
+            query_vectors = embed_queries(batch, self.model, batch_size=batch_size)
+
+            for results in search_faiss_batch(query_vectors, self.index, self.metadata, top_k=top_k):
+                if filter_fn:
+                    results = list(filter(filter_fn, results))
+                yield results
+
+    def search_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        batch_size: int = 512,
+        filter_fn: Optional[callable] = None
+    ) -> List[List[Dict]]:
+        """
+        Perform semantic search for many queries at once. See iter_search_many.
+        """
+        return list(self.iter_search_many(queries, top_k, batch_size, filter_fn))
+
     def explain_result(self, result: Dict, show_meta: bool = False) -> str:
         """
         Create a human-readable summary of a result block.
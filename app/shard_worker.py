@@ -0,0 +1,49 @@
+from app.vector_store import load_embeddings_json, create_faiss_index, search_faiss
+
+# Kept apart from app.sharding so spawned shard processes only import
+# FAISS/numpy, not the embedding model stack.
+
+
+def run_shard_worker(shard_id: int, shard_path: str, conn):
+    """
+    Worker process loop: load one shard file, own its FAISS index and answer
+    search requests. Chunk vectors live only in the index; metadata kept for
+    results (and sent back over the pipe) has no "vector" field.
+
+    Messages in:  ("search", request_id, query_vector, top_k) | ("ping", request_id) | ("stop",)
+    Messages out: ("ready", ntotal) once, then (request_id, payload)
+    """
+    try:
+        vectors, data = load_embeddings_json(shard_path)
+    except ValueError:
+        vectors, data = None, []  # empty shard
+
+    index = create_faiss_index(vectors) if vectors is not None else None
+    metadata = [{k: v for k, v in chunk.items() if k != "vector"} for chunk in data]
+    del vectors, data
+    conn.send(("ready", index.ntotal if index is not None else 0))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+
+        kind = message[0]
+        if kind == "stop":
+            break
+        if kind == "ping":
+            conn.send((message[1], index.ntotal if index is not None else 0))
+            continue
+        if kind == "search":
+            _, request_id, query_vector, top_k = message
+            try:
+                if index is None:
+                    results = []
+                else:
+                    results = search_faiss(query_vector, index, metadata, top_k=min(top_k, index.ntotal))
+                conn.send((request_id, results))
+            except Exception as e:
+                conn.send((request_id, RuntimeError(f"Shard {shard_id} search failed: {e}")))
+
+    conn.close()
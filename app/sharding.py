@@ -0,0 +1,387 @@
+from app.vector_store import save_embeddings_json
+from app.shard_worker import run_shard_worker
+from typing import List, Dict, Optional, Literal, Tuple
+import multiprocessing as mp
+import numpy as np
+import itertools
+import threading
+import hashlib
+import queue
+import json
+import time
+import os
+
+SHARD_STRATEGIES = ("document", "hash")
+
+
+def assign_shards(
+    metadata: List[Dict],
+    num_shards: int,
+    strategy: Literal["document", "hash"] = "document"
+) -> List[List[int]]:
+    """
+    Split chunk positions into `num_shards` groups.
+
+    Args:
+        metadata: Chunk metadata, aligned with the vector matrix.
+        num_shards: Number of shards to create.
+        strategy: 'document' keeps every chunk of a document on the same
+            shard (documents are dealt round-robin); 'hash' spreads chunks
+            by a stable hash of their chunk_id. Under 'document', chunks
+            without a document key (meta.doc_id / meta.filename) are placed
+            by hash instead.
+
+    Returns:
+        One list of row positions per shard.
+    """
+    if num_shards < 1:
+        raise ValueError("num_shards must be at least 1.")
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"Invalid shard strategy: {strategy}")
+
+    shards: List[List[int]] = [[] for _ in range(num_shards)]
+
+    doc_to_shard: Dict[str, int] = {}
+    for i, chunk in enumerate(metadata):
+        doc = _document_key(chunk) if strategy == "document" else None
+        if doc is None:
+            shards[_hash_shard(chunk, i, num_shards)].append(i)
+            continue
+        if doc not in doc_to_shard:
+            doc_to_shard[doc] = len(doc_to_shard) % num_shards
+        shards[doc_to_shard[doc]].append(i)
+
+    return shards
+
+
+def merge_shard_results(shard_results: List[List[Dict]], top_k: int) -> List[Dict]:
+    """
+    Merge per-shard top-k lists into one global top-k list by score.
+    """
+    merged = [r for results in shard_results for r in results]
+    merged.sort(key=lambda r: r.get("score", 0), reverse=True)
+    return merged[:top_k]
+
+
+def _document_key(chunk: Dict) -> Optional[str]:
+    """Document identity for a chunk, or None if it carries none."""
+    meta = chunk.get("meta", {}) or {}
+    doc = meta.get("doc_id") or meta.get("filename") or chunk.get("doc_id")
+    return str(doc) if doc else None
+
+
+def _hash_shard(chunk: Dict, position: int, num_shards: int) -> int:
+    """Stable shard for a chunk from its chunk_id (or text)."""
+    key = chunk.get("chunk_id") or chunk.get("chunk_text") or str(position)
+    return int(hashlib.md5(key.encode()).hexdigest(), 16) % num_shards
+
+
+def split_embeddings(
+    embedding_path: str,
+    shard_dir: str,
+    num_shards: int,
+    strategy: Literal["document", "hash"] = "document"
+) -> List[str]:
+    """
+    Write one embeddings JSON file per shard plus a manifest.json.
+
+    Files are reused while the manifest matches the source file's mtime,
+    shard count and strategy. Returns the shard file paths.
+    """
+    paths = [os.path.join(shard_dir, f"shard_{i}.json") for i in range(num_shards)]
+    manifest_path = os.path.join(shard_dir, "manifest.json")
+    manifest = {
+        "source": os.path.abspath(embedding_path),
+        "source_mtime": os.path.getmtime(embedding_path),
+        "num_shards": num_shards,
+        "strategy": strategy,
+    }
+
+    if os.path.exists(manifest_path) and all(os.path.exists(p) for p in paths):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            if {k: v for k, v in json.load(f).items() if k in manifest} == manifest:
+                return paths
+
+    with open(embedding_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    assignments = assign_shards(data, num_shards, strategy)
+    for path, positions in zip(paths, assignments):
+        save_embeddings_json([data[i] for i in positions], path)
+
+    manifest["sizes"] = [len(p) for p in assignments]
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return paths
+
+
+class ShardCoordinator:
+    def __init__(
+        self,
+        shard_paths: List[str],
+        timeout: float = 2.0,
+        start_timeout: float = 60.0
+    ):
+        """
+        Start one worker process per shard file. Each worker loads only its
+        own file; the coordinator never holds vectors or chunk metadata.
+        """
+        self.shard_paths = shard_paths
+        self.num_shards = len(shard_paths)
+        self.timeout = timeout
+        self.sizes: List[Optional[int]] = [None] * self.num_shards
+        self._request_ids = itertools.count()
+        self._waiters: Dict[int, queue.Queue] = {}
+        self._waiters_lock = threading.Lock()
+        self._send_locks = [threading.Lock() for _ in shard_paths]
+
+        ctx = mp.get_context("spawn")
+        self.conns = []
+        self.processes = []
+        self.readers = []
+
+        for shard_id, path in enumerate(shard_paths):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=run_shard_worker,
+                args=(shard_id, path, child_conn),
+                name=f"neurona-shard-{shard_id}",
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self.conns.append(parent_conn)
+            self.processes.append(process)
+
+        ready: queue.Queue = queue.Queue()
+        for shard_id, conn in enumerate(self.conns):
+            reader = threading.Thread(
+                target=self._read_replies, args=(shard_id, conn, ready), name=f"neurona-shard-reader-{shard_id}", daemon=True
+            )
+            reader.start()
+            self.readers.append(reader)
+
+        replies, failed = self._gather(ready, set(range(self.num_shards)), start_timeout)
+        for shard_id, size in replies.items():
+            self.sizes[shard_id] = size
+        if failed:
+            print(f"⚠️ Shards {failed} did not report ready in {start_timeout}s")
+        print(f"🧩 Started {self.num_shards} shards with sizes {self.sizes}")
+
+    # ------------------------------------
+    # Reply routing
+    # ------------------------------------
+    def _register(self, request_id: int) -> queue.Queue:
+        replies: queue.Queue = queue.Queue()
+        with self._waiters_lock:
+            self._waiters[request_id] = replies
+        return replies
+
+    def _unregister(self, request_id: int):
+        with self._waiters_lock:
+            self._waiters.pop(request_id, None)
+
+    def _read_replies(self, shard_id: int, conn, ready: queue.Queue):
+        """
+        Reader thread for one shard pipe: route each reply to the queue of the
+        request it answers. Replies for requests that already gave up are dropped.
+        """
+        while True:
+            try:
+                reply_id, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+            if reply_id == "ready":
+                ready.put((shard_id, payload))
+                continue
+            with self._waiters_lock:
+                replies = self._waiters.get(reply_id)
+            if replies is not None:
+                replies.put((shard_id, payload))
+
+        # Shard is gone: fail every request still waiting on it.
+        ready.put((shard_id, EOFError(f"Shard {shard_id} exited")))
+        with self._waiters_lock:
+            waiting = list(self._waiters.values())
+        for replies in waiting:
+            replies.put((shard_id, EOFError(f"Shard {shard_id} exited")))
+
+    def _broadcast(self, message: Tuple) -> Tuple[set, List[int]]:
+        """Send a message to every live shard. Returns (sent, failed)."""
+        sent, failed = set(), []
+        for shard_id, conn in enumerate(self.conns):
+            if not self.processes[shard_id].is_alive():
+                failed.append(shard_id)
+                continue
+            try:
+                with self._send_locks[shard_id]:
+                    conn.send(message)
+                sent.add(shard_id)
+            except (BrokenPipeError, OSError):
+                failed.append(shard_id)
+        return sent, failed
+
+    def _gather(self, replies: queue.Queue, pending: set, timeout: float) -> Tuple[Dict[int, object], List[int]]:
+        """Collect one reply per pending shard until the deadline."""
+        results: Dict[int, object] = {}
+        failed: List[int] = []
+        deadline = time.monotonic() + timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                shard_id, payload = replies.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if shard_id not in pending:
+                continue
+            pending.discard(shard_id)
+            if isinstance(payload, Exception):
+                print(f"⚠️ {payload}")
+                failed.append(shard_id)
+            else:
+                results[shard_id] = payload
+        failed.extend(pending)
+        return results, sorted(failed)
+
+    def _call(self, kind: str, args: Tuple, timeout: float) -> Tuple[Dict[int, object], List[int]]:
+        """Scatter one request to all shards and gather the replies."""
+        request_id = next(self._request_ids)
+        replies = self._register(request_id)
+        try:
+            sent, failed = self._broadcast((kind, request_id) + args)
+            results, late = self._gather(replies, sent, timeout)
+        finally:
+            self._unregister(request_id)
+        return results, sorted(failed + late)
+
+    # ------------------------------------
+    # Public API
+    # ------------------------------------
+    def search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 5,
+        timeout: Optional[float] = None
+    ) -> Tuple[List[Dict], List[int]]:
+        """
+        Scatter a query vector to every live shard and gather the merged top-k.
+
+        Safe to call from many threads at once; replies are matched to
+        queries by request id, so one slow shard only delays its own callers.
+
+        Returns:
+            (results, failed_shards). Shards that are down, error out or miss
+            the deadline are listed in failed_shards and left out of results.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        results, failed = self._call("search", (query_vector, top_k), timeout)
+
+        if failed:
+            print(f"⚠️ Partial results: shards {failed} did not answer")
+
+        return merge_shard_results(list(results.values()), top_k), failed
+
+    def health(self, timeout: float = 1.0) -> List[Dict]:
+        """
+        Ping every shard and report liveness and index size.
+        """
+        results, _ = self._call("ping", (), timeout)
+        return [
+            {"shard": shard_id, "alive": shard_id in results, "vectors": results.get(shard_id)}
+            for shard_id in range(self.num_shards)
+        ]
+
+    def close(self):
+        """
+        Stop all shard workers.
+        """
+        self._broadcast(("stop",))
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self.conns:
+            conn.close()
+
+
+class ShardedSearchEngine:
+    def __init__(
+        self,
+        model_name: str = "mpnet",
+        embedding_path: str = "data/embeddings/sample_embeddings.json",
+        num_shards: int = 2,
+        strategy: Literal["document", "hash"] = "document",
+        timeout: float = 2.0,
+        shard_dir: Optional[str] = None
+    ):
+        """
+        Drop-in counterpart of NeuronaSearchEngine backed by shard processes.
+
+        The embeddings file is split into per-shard files under `shard_dir`
+        (default: '<embedding_path>.shards/') by a short-lived helper process,
+        so no single process ever loads the whole corpus.
+        """
+        if not os.path.exists(embedding_path):
+            raise FileNotFoundError(f"Embedding file not found: {embedding_path}")
+
+        shard_dir = shard_dir or f"{os.path.splitext(embedding_path)[0]}.shards"
+        print(f"📂 Splitting embedded vectors into {num_shards} shards...")
+        ctx = mp.get_context("spawn")
+        splitter = ctx.Process(target=split_embeddings, args=(embedding_path, shard_dir, num_shards, strategy))
+        splitter.start()
+        splitter.join()
+        if splitter.exitcode != 0:
+            raise RuntimeError(f"Splitting {embedding_path} into shards failed (exit code {splitter.exitcode}).")
+
+        shard_paths = [os.path.join(shard_dir, f"shard_{i}.json") for i in range(num_shards)]
+        self.coordinator = ShardCoordinator(shard_paths, timeout=timeout)
+        self.last_failed_shards: List[int] = []
+
+        # Imported here so shard processes (spawn re-imports the parent's
+        # __main__) don't pull in sentence_transformers.
+        from app.embedder import load_model
+
+        print(f"🧠 Loading model '{model_name}' for search...")
+        self.model = load_model(model_name)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        filter_fn: Optional[callable] = None
+    ) -> List[Dict]:
+        """
+        Perform semantic search across all shards. Optionally apply a metadata filter function.
+        """
+        if not query.strip():
+            raise ValueError("Query must not be empty.")
+
+        print(f"🔍 Searching top {top_k} matches across {self.coordinator.num_shards} shards for: “{query}”")
+        from app.embedder import embed_query
+
+        query_vector = embed_query(query, self.model)
+
+        results, self.last_failed_shards = self.coordinator.search(query_vector, top_k=top_k)
+
+        if filter_fn:
+            results = list(filter(filter_fn, results))
+
+        return results
+
+    def health(self) -> List[Dict]:
+        return self.coordinator.health()
+
+    def get_index_info(self) -> str:
+        sizes = self.coordinator.sizes
+        return f"Sharded FAISS Index: {sum(s or 0 for s in sizes)} vectors over {len(sizes)} shards {sizes}"
+
+    def close(self):
+        self.coordinator.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -70,11 +70,31 @@ def search_faiss(query_vector: np.ndarray, index: faiss.Index, metadata: List[Di
     if D.shape[0] == 0 or I.shape[0] == 0:
         raise ValueError("❌ Search failed: FAISS returned empty results.")
 
+    return _collect_results(D[0], I[0], metadata)
+
+
+def search_faiss_batch(query_vectors: np.ndarray, index: faiss.Index, metadata: List[Dict], top_k: int = 5) -> List[List[Dict]]:
+    """
+    Search many query vectors with a single FAISS call.
+    Returns one top-k result list per query row, in input order.
+    """
+    if query_vectors.ndim == 1:
+        query_vectors = query_vectors.reshape(1, -1)
+
+    query_vectors = np.ascontiguousarray(query_vectors, dtype="float32")
+    faiss.normalize_L2(query_vectors)
+
+    D, I = index.search(query_vectors, top_k)
+
+    return [_collect_results(scores, ids, metadata) for scores, ids in zip(D, I)]
+
+
+def _collect_results(scores: np.ndarray, ids: np.ndarray, metadata: List[Dict]) -> List[Dict]:
+    """Map one row of FAISS scores/ids back to scored metadata copies."""
     results = []
-    for score, idx in zip(D[0], I[0]):
+    for score, idx in zip(scores, ids):
         if 0 <= idx < len(metadata):
             item = metadata[idx].copy()
             item["score"] = float(score)
             results.append(item)
-
     return results
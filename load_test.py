@@ -0,0 +1,383 @@
+"""
+Concurrent load generator for the Neurona FastAPI service.
+
+Replays a weighted mix of /search and /embed traffic at a fixed request rate
+per stage and reports throughput, error rate and latency percentiles, so the
+latency curve can be read off as RPS increases.
+
+Examples:
+    # In-process app with a deterministic stub encoder (no model download)
+    python load_test.py --stub-encoder --rps 2,5,10,20 --duration 15
+
+    # Against an already running server (search-only by default)
+    python load_test.py --url http://127.0.0.1:8000
+
+    # Against a running server, including ingest traffic
+    python load_test.py --url http://127.0.0.1:8000 --allow-ingest --mix search=0.8,embed=0.2
+
+Every /embed call replaces the server's embeddings file (EMBED_PATH). In-process
+runs write into a temporary directory, but with --url the target's index is
+overwritten, so ingest traffic and the warm-up upload are only sent to a
+--url target when --allow-ingest is given.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+import urllib.request
+import urllib.error
+import numpy as np
+import threading
+import argparse
+import hashlib
+import tempfile
+import socket
+import random
+import json
+import time
+import uuid
+import os
+
+DEFAULT_QUERIES = [
+    "What is LegitReach?",
+    "Summarize the main findings",
+    "Which methods were used for evaluation?",
+    "Who are the authors of this document?",
+    "What are the limitations mentioned?",
+]
+
+SAMPLE_PARAGRAPHS = [
+    "Neurona extracts text from PDF documents and splits it into chunks.",
+    "Each chunk is embedded with a sentence transformer and indexed with FAISS.",
+    "Semantic search ranks chunks by cosine similarity to the query embedding.",
+    "Load testing measures throughput and tail latency under mixed traffic.",
+]
+
+
+class StubEncoder:
+    """
+    Deterministic stand-in for SentenceTransformer.encode.
+
+    Vectors are derived from an md5 hash of the text, so identical texts map to
+    identical vectors and no model has to be downloaded.
+    """
+
+    def __init__(self, dim: int = 768):
+        self.dim = dim
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+        vectors = np.empty((len(texts), self.dim), dtype="float32")
+        for i, text in enumerate(texts):
+            seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+            vectors[i] = np.random.default_rng(seed).standard_normal(self.dim)
+        return vectors
+
+
+# ------------------------------------
+# Target setup
+# ------------------------------------
+def start_inprocess_server(stub_encoder: bool, workdir: str) -> Tuple[str, object, threading.Thread]:
+    """
+    Import main.py in this process, point its data paths at `workdir` and
+    serve it with uvicorn on a free local port from a background thread.
+    """
+    if stub_encoder:
+        from app import embedder
+        embedder._loaded_models["mpnet"] = StubEncoder()
+
+    import uvicorn
+    import main
+
+    main.UPLOAD_DIR = os.path.join(workdir, "uploads")
+    main.EMBED_PATH = os.path.join(workdir, "embeddings", "load_test.json")
+    os.makedirs(main.UPLOAD_DIR, exist_ok=True)
+    os.makedirs(os.path.dirname(main.EMBED_PATH), exist_ok=True)
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("In-process server failed to start.")
+        time.sleep(0.05)
+
+    print(f"🚀 In-process Neurona app listening on 127.0.0.1:{port}")
+    return f"http://127.0.0.1:{port}", server, thread
+
+
+def stop_inprocess_server(server, thread: threading.Thread, timeout: float = 30.0):
+    """
+    Ask uvicorn to exit and wait for in-flight requests to drain, so nothing
+    is still writing into the work directory when it gets deleted.
+    """
+    server.should_exit = True
+    thread.join(timeout)
+    if thread.is_alive():
+        print(f"⚠️ In-process server did not stop within {timeout:g}s")
+
+
+def make_sample_pdf(path: str, pages: int = 3):
+    """
+    Write a small text PDF used as the /embed payload.
+    """
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for p in range(pages):
+        page = doc.new_page()
+        text = "\n\n".join(random.sample(SAMPLE_PARAGRAPHS, len(SAMPLE_PARAGRAPHS)))
+        page.insert_text((72, 72), f"Page {p + 1}\n\n{text}", fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+# ------------------------------------
+# HTTP calls (stdlib only)
+# ------------------------------------
+def _post(url: str, body: bytes, content_type: str, timeout: float) -> int:
+    request = urllib.request.Request(url, data=body, method="POST", headers={"Content-Type": content_type})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def call_search(base_url: str, query: str, timeout: float) -> int:
+    body = json.dumps({"query": query}).encode()
+    return _post(f"{base_url}/search", body, "application/json", timeout)
+
+
+def call_embed(base_url: str, pdf_bytes: bytes, timeout: float) -> int:
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="load_test.pdf"\r\n'
+        f"Content-Type: application/pdf\r\n\r\n"
+    ).encode() + pdf_bytes + f"\r\n--{boundary}--\r\n".encode()
+    return _post(f"{base_url}/embed", body, f"multipart/form-data; boundary={boundary}", timeout)
+
+
+# ------------------------------------
+# Load generation
+# ------------------------------------
+def parse_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse 'search=0.9,embed=0.1' into normalized weights.
+    """
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("search", "embed"):
+            raise ValueError(f"Unknown request kind in mix: {name}")
+        mix[name] = float(weight or 1)
+        if mix[name] < 0:
+            raise ValueError(f"Mix weight for {name} must not be negative.")
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Mix weights must sum to a positive number.")
+    return {k: v / total for k, v in mix.items()}
+
+
+def run_stage(
+    base_url: str,
+    rps: float,
+    duration: float,
+    mix: Dict[str, float],
+    queries: List[str],
+    pdf_bytes: bytes,
+    max_workers: int,
+    timeout: float,
+    seed: int
+) -> Dict:
+    """
+    Issue requests open-loop at `rps` for `duration` seconds.
+
+    Latency is measured from each request's scheduled send time, so queueing
+    inside the generator is counted instead of hidden (no coordinated omission).
+    """
+    if rps <= 0:
+        raise ValueError("rps must be positive.")
+
+    rng = random.Random(seed)
+    kinds, weights = zip(*mix.items())
+    records: List[Tuple[str, float, bool]] = []
+    lock = threading.Lock()
+
+    def fire(kind: str, scheduled: float, payload):
+        try:
+            if kind == "search":
+                status = call_search(base_url, payload, timeout)
+            else:
+                status = call_embed(base_url, payload, timeout)
+            ok = 200 <= status < 300
+        except Exception:
+            ok = False
+        latency = time.perf_counter() - scheduled
+        with lock:
+            records.append((kind, latency, ok))
+
+    total = int(rps * duration)
+    interval = 1.0 / rps
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        start = time.perf_counter()
+        for n in range(total):
+            scheduled = start + n * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind = rng.choices(kinds, weights)[0]
+            payload = rng.choice(queries) if kind == "search" else pdf_bytes
+            pool.submit(fire, kind, scheduled, payload)
+    elapsed = time.perf_counter() - start
+
+    return summarize(rps, elapsed, records)
+
+
+def summarize(rps: float, elapsed: float, records: List[Tuple[str, float, bool]]) -> Dict:
+    """
+    Reduce raw (kind, latency, ok) records to throughput/latency/error stats.
+    """
+    def stats(rows):
+        latencies = np.array([r[1] for r in rows if r[2]]) * 1000
+        errors = sum(1 for r in rows if not r[2])
+        out = {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+        }
+        for p in (50, 95, 99):
+            out[f"p{p}_ms"] = round(float(np.percentile(latencies, p)), 2) if latencies.size else None
+        return out
+
+    report = {
+        "target_rps": rps,
+        "achieved_rps": round(sum(1 for r in records if r[2]) / elapsed, 2) if elapsed else 0.0,
+        **stats(records),
+        "by_kind": {},
+    }
+    for kind in sorted({r[0] for r in records}):
+        report["by_kind"][kind] = stats([r for r in records if r[0] == kind])
+    return report
+
+
+def print_curve(reports: List[Dict]):
+    """
+    Print the latency curve as a table, one row per RPS stage.
+    """
+    header = f"{'target':>8} {'achieved':>9} {'reqs':>6} {'err%':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(f"\n📈 Latency curve\n{header}\n{'-' * len(header)}")
+    fmt = lambda v: f"{v:>9.1f}" if v is not None else f"{'-':>9}"
+    for r in reports:
+        print(
+            f"{r['target_rps']:>8g} {r['achieved_rps']:>9.2f} {r['requests']:>6} "
+            f"{r['error_rate'] * 100:>6.1f} {fmt(r['p50_ms'])} {fmt(r['p95_ms'])} {fmt(r['p99_ms'])}"
+        )
+        for kind, s in r["by_kind"].items():
+            print(
+                f"{'':>8} {kind:>9} {s['requests']:>6} {s['error_rate'] * 100:>6.1f} "
+                f"{fmt(s['p50_ms'])} {fmt(s['p95_ms'])} {fmt(s['p99_ms'])}"
+            )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Neurona concurrent load tester")
+    parser.add_argument("--url", help="Base URL of a running server. Omit to start the app in-process.")
+    parser.add_argument("--stub-encoder", action="store_true", help="Use a deterministic stub encoder (in-process only).")
+    parser.add_argument("--rps", default="2,5,10", help="Comma-separated target RPS per stage.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per stage.")
+    parser.add_argument(
+        "--mix",
+        help="Weighted request mix (default: search=0.9,embed=0.1 in-process or with --allow-ingest, else search=1)."
+    )
+    parser.add_argument(
+        "--allow-ingest",
+        action="store_true",
+        help="Send /embed traffic to a --url target. This overwrites that server's embeddings file."
+    )
+    parser.add_argument("--queries", help="File with one query per line.")
+    parser.add_argument("--pdf", help="PDF to upload for /embed (a small one is generated otherwise).")
+    parser.add_argument("--max-workers", type=int, default=64, help="Max in-flight requests.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="Write the full report to this JSON file.")
+    args = parser.parse_args(argv)
+
+    if args.stub_encoder and args.url:
+        parser.error("--stub-encoder only applies when the app runs in-process.")
+
+    ingest_allowed = not args.url or args.allow_ingest
+    if args.mix is None:
+        args.mix = "search=0.9,embed=0.1" if ingest_allowed else "search=1"
+
+    try:
+        mix = parse_mix(args.mix)
+        stages = [float(r) for r in args.rps.split(",") if r.strip()]
+    except ValueError as e:
+        parser.error(str(e))
+    if mix.get("embed", 0) > 0 and not ingest_allowed:
+        parser.error("/embed replaces the target server's index; pass --allow-ingest to send it to --url.")
+    if not stages or any(rps <= 0 for rps in stages):
+        parser.error("--rps must be a comma-separated list of positive numbers.")
+    if args.duration <= 0:
+        parser.error("--duration must be positive.")
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory(prefix="neurona_load_") as workdir:
+        pdf_bytes = b""
+        if ingest_allowed:
+            pdf_path = args.pdf or os.path.join(workdir, "sample.pdf")
+            if not args.pdf:
+                make_sample_pdf(pdf_path)
+            with open(pdf_path, "rb") as f:
+                pdf_bytes = f.read()
+
+        server = thread = None
+        base_url = args.url.rstrip("/") if args.url else None
+        if base_url is None:
+            base_url, server, thread = start_inprocess_server(args.stub_encoder, workdir)
+
+        try:
+            # Seed the store so /search has something to load. A --url target
+            # is only written to with --allow-ingest; otherwise it must already
+            # have embeddings.
+            if ingest_allowed:
+                status = call_embed(base_url, pdf_bytes, args.timeout)
+                if status != 200:
+                    print(f"⚠️ Warm-up /embed returned HTTP {status}")
+
+            reports = []
+            for i, rps in enumerate(stages):
+                print(f"⏱️ Stage {i + 1}/{len(stages)}: {rps:g} RPS for {args.duration:g}s")
+                reports.append(run_stage(
+                    base_url, rps, args.duration, mix, queries, pdf_bytes,
+                    args.max_workers, args.timeout, args.seed + i
+                ))
+        finally:
+            if server is not None:
+                stop_inprocess_server(server, thread)
+
+    print_curve(reports)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"mix": mix, "duration": args.duration, "stages": reports}, f, indent=2)
+        print(f"\n✅ Saved report to {args.json_path}")
+
+    return reports
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Header, Depends
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.parser import extract_text_from_pdf
 from app.chunker import chunk_text
@@ -9,6 +10,10 @@ from app.vector_store import (
     search_faiss,
 )
 from app.search import NeuronaSearchEngine
+from app.profiler import RequestProfiler, ProfilingMiddleware
+import secrets
+import json
+import math
 import os
 import uuid
 import shutil
@@ -27,11 +32,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ✅ On-demand profiler (idle unless armed via /admin/profile/start)
+profiler = RequestProfiler()
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
 # ------------------------------------
 # ✅ Global config
 # ------------------------------------
 UPLOAD_DIR = "data/uploads"
 EMBED_PATH = "data/embeddings/sample_embeddings.json"
+MAX_BATCH_TOP_K = 100
+ADMIN_TOKEN = os.getenv("NEURONA_ADMIN_TOKEN")  # admin routes are disabled when unset
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(os.path.dirname(EMBED_PATH), exist_ok=True)
 
@@ -57,6 +68,8 @@ async def embed_pdf(file: UploadFile = File(...)):
         if not pages:
             raise HTTPException(status_code=400, detail="No text extracted from PDF.")
         chunks = chunk_text(pages, mode="paragraph", max_words=150, overlap=30)
+        for chunk in chunks:
+            chunk["meta"] = {"doc_id": file_id, "filename": file.filename}
 
         # Embed and save
         embedded_chunks = embed_chunks(chunks, global_model)
@@ -86,3 +99,119 @@ async def search(query: dict):
         return {"results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+
+# ------------------------------------
+# 📌 Route: /search/batch
+# ------------------------------------
+@app.post("/search/batch")
+async def search_batch(payload: dict):
+    queries = payload.get("queries")
+    top_k = payload.get("top_k", 5)
+    if not isinstance(queries, list) or not queries:
+        raise HTTPException(status_code=400, detail="Queries missing.")
+    if not all(isinstance(q, str) and q.strip() for q in queries):
+        raise HTTPException(status_code=400, detail="Queries must be non-empty strings.")
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or not 1 <= top_k <= MAX_BATCH_TOP_K:
+        raise HTTPException(status_code=400, detail=f"top_k must be an integer between 1 and {MAX_BATCH_TOP_K}.")
+
+    try:
+        engine = NeuronaSearchEngine(model_name="mpnet", embedding_path=EMBED_PATH)
+        engine.model = global_model  # reuse loaded model
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+    # One NDJSON line per query, streamed as each encode/search batch completes.
+    # Starlette iterates this sync generator in its threadpool, so the encode/FAISS
+    # work here is only visible to the profiler in 'sampling' mode.
+    def stream_results():
+        i = 0
+        try:
+            for results in engine.iter_search_many(queries, top_k=top_k):
+                # Drop the raw embedding from each hit; clients only need text + metadata
+                hits = [{k: v for k, v in r.items() if k != "vector"} for r in results]
+                yield json.dumps({"index": i, "query": queries[i], "results": hits}) + "\n"
+                i += 1
+        except Exception as e:
+            # `index` is the first query without results; later ones are not attempted
+            yield json.dumps({"index": i, "query": queries[i], "error": f"Search failed: {str(e)}"}) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+# ------------------------------------
+# 🔒 Admin: on-demand profiling
+# ------------------------------------
+def require_admin(x_admin_token: str = Header(None)):
+    if not ADMIN_TOKEN or not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin access required.")
+
+
+def _option(options: dict, key: str, cast, default=None):
+    """Read a numeric option; bools, non-integral ints and non-finite numbers raise ValueError."""
+    value = options.get(key, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"'{key}' must be a number.")
+    if cast is int and isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"'{key}' must be an integer.")
+    try:
+        number = cast(value)
+    except ValueError:
+        raise ValueError(f"'{key}' must be {'an integer' if cast is int else 'a number'}.")
+    if not math.isfinite(number):
+        raise ValueError(f"'{key}' must be finite.")
+    return number
+
+
+# Admin routes stay `async def` so they run on the event-loop thread,
+# the same thread cProfile was enabled on.
+@app.post("/admin/profile/start", dependencies=[Depends(require_admin)])
+async def profile_start(options: dict):
+    try:
+        return profiler.start(
+            mode=options.get("mode", "cprofile"),
+            requests=_option(options, "requests", int),
+            seconds=_option(options, "seconds", float),
+            trace_malloc=options.get("tracemalloc", False),
+            top=_option(options, "top", int, default=25),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.get("/admin/profile/status", dependencies=[Depends(require_admin)])
+async def profile_status():
+    return profiler.status()
+
+
+@app.post("/admin/profile/stop", dependencies=[Depends(require_admin)])
+async def profile_stop():
+    return {"result": profiler.stop()}
+
+
+@app.get("/admin/profile/result", dependencies=[Depends(require_admin)])
+async def profile_result(format: str = "json"):
+    try:
+        output = profiler.export(format)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "pstats":
+        return Response(
+            content=output,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": 'attachment; filename="neurona.pstats"'},
+        )
+    if format == "collapsed":
+        return Response(
+            content=output,
+            media_type="text/plain",
+            headers={"Content-Disposition": 'attachment; filename="neurona.collapsed.txt"'},
+        )
+    return output
@@ -0,0 +1,58 @@
+from load_test import parse_mix, summarize, main as load_test_main
+import contextlib
+import io
+
+def main():
+    print("⏱️ [Test] Load Test Helpers Validation\n")
+
+    # Step 1: Mix parsing normalizes weights and rejects bad specs
+    mix = parse_mix("search=3,embed=1")
+    assert mix == {"search": 0.75, "embed": 0.25}, f"Unexpected mix: {mix}"
+    assert parse_mix("search") == {"search": 1.0}, "Missing weight should default to 1"
+    for bad in ("search=1,upload=1", "search=0", "search=-1,embed=2", "search=abc"):
+        try:
+            parse_mix(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"parse_mix accepted {bad!r}")
+    print(f"✅ Parsed mix: {mix}")
+
+    # Step 2: Summary stats over known latencies
+    records = [("search", i / 1000, True) for i in range(1, 101)]  # 1..100 ms
+    records += [("embed", 0.5, True), ("embed", 2.0, False)]
+    report = summarize(10, 10.0, records)
+
+    assert report["requests"] == 102 and report["errors"] == 1
+    assert report["achieved_rps"] == 10.1, "Throughput must count successes only"
+    search = report["by_kind"]["search"]
+    assert search["error_rate"] == 0.0
+    assert abs(search["p50_ms"] - 50.5) < 0.01, search
+    assert abs(search["p99_ms"] - 99.01) < 0.01, search
+    assert report["by_kind"]["embed"]["error_rate"] == 0.5
+    assert report["by_kind"]["embed"]["p50_ms"] == 500.0, "Failed requests must not count toward latency"
+    print(f"✅ Summary: {report}")
+
+    # Step 3: Empty stage does not crash
+    empty = summarize(5, 1.0, [])
+    assert empty["requests"] == 0 and empty["p95_ms"] is None
+
+    # Step 4: --url never sends /embed (which overwrites the target's index) without --allow-ingest
+    for argv in (
+        ["--url", "http://127.0.0.1:9", "--mix", "search=1,embed=1"],
+        ["--url", "http://127.0.0.1:9", "--mix", "embed"],
+        ["--rps", "0"],
+        ["--rps", "5,-1"],
+    ):
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                load_test_main(argv)
+        except SystemExit as e:
+            assert e.code == 2, f"{argv} should be a usage error"
+            continue
+        raise AssertionError(f"Accepted unsafe or invalid arguments: {argv}")
+    print("✅ Ingest against --url requires --allow-ingest; bad stages rejected")
+
+    print("\n✅ Load test helpers are functional.\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+from app.profiler import RequestProfiler, ProfilingMiddleware
+import tempfile
+import threading
+import asyncio
+import pstats
+import time
+import os
+
+# ---- CONFIG ----
+REQUESTS = 3
+WINDOW_SECONDS = 0.3
+ADMIN_TOKEN = "test-admin-token"
+# ----------------
+
+retained = []  # allocations kept alive past the session, like a cache would
+
+def fake_request(work: int = 200_000):
+    total = sum(i * i for i in range(work))
+    retained.append([bytearray(1024) for _ in range(200)])
+    scratch = bytearray(20 * 1024 * 1024)  # allocated and freed inside the request
+    del scratch
+    return total
+
+def check_admin_guard():
+    import main
+    from fastapi import HTTPException
+
+    def rejected(token):
+        try:
+            main.require_admin(token)
+        except HTTPException as e:
+            return e.status_code == 403
+        return False
+
+    original = main.ADMIN_TOKEN
+    try:
+        main.ADMIN_TOKEN = None
+        assert rejected(None) and rejected("anything"), "Admin routes must be disabled without NEURONA_ADMIN_TOKEN"
+
+        main.ADMIN_TOKEN = ADMIN_TOKEN
+        assert rejected(None), "Missing X-Admin-Token must be rejected"
+        assert rejected("wrong-token"), "Wrong X-Admin-Token must be rejected"
+        main.require_admin(ADMIN_TOKEN)
+    finally:
+        main.ADMIN_TOKEN = original
+
+    for bad in ({"requests": "five"}, {"requests": 2.5}, {"requests": True}, {"seconds": "inf"}, {"top": [1]}):
+        key = next(iter(bad))
+        try:
+            main._option(bad, key, float if key == "seconds" else int)
+        except ValueError:
+            continue
+        raise AssertionError(f"Bad profile option accepted: {bad}")
+    assert main._option({"requests": "5"}, "requests", int) == 5
+    print("✅ Admin guard and option parsing behave")
+
+def main():
+    print("🩺 [Test] Request Profiler Validation\n")
+    profiler = RequestProfiler()
+
+    # Step 1: Idle profiler does nothing
+    assert not profiler.active, "Profiler must start idle"
+    assert profiler.summary() is None, "No result expected before a session"
+
+    # Step 2: cProfile for the next N requests + tracemalloc
+    profiler.start(mode="cprofile", requests=REQUESTS, trace_malloc=True)
+    for _ in range(REQUESTS):
+        session = profiler.before_request()
+        assert session, "Request should join the session"
+        fake_request()
+        profiler.after_request(session)
+    assert not profiler.active, "Session should finish after N requests"
+
+    summary = profiler.summary()
+    assert summary["requests"] == REQUESTS
+    assert summary["top_functions"], "No functions recorded"
+    top_site = summary["top_allocations"][0]
+    assert "test_profiler.py" in top_site["site"], f"Top allocation is profiler noise: {top_site}"
+    assert not any("cProfile" in a["site"] for a in summary["top_allocations"]), "cProfile frames not filtered"
+    assert summary["peak_traced_kb"] >= 20 * 1024, "Freed per-request allocation missing from peak"
+    print(f"✅ cProfile captured {len(summary['top_functions'])} functions")
+    print(f"✅ Top allocation site: {top_site} | peak {summary['peak_traced_kb']} KB")
+
+    # Step 3: pstats export loads with the stdlib
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "neurona.pstats")
+        with open(path, "wb") as f:
+            f.write(profiler.export("pstats"))
+        pstats.Stats(path).sort_stats("cumulative").print_stats(5)
+
+    # Step 4: Sampling profiler over a time window, with an idle thread that must not show up
+    idle = threading.Event()
+    threading.Thread(target=idle.wait, name="idle-worker", daemon=True).start()
+    profiler.start(mode="sampling", seconds=WINDOW_SECONDS)
+    session = profiler.before_request()
+    deadline = time.time() + WINDOW_SECONDS + 0.1
+    while time.time() < deadline:
+        fake_request(10_000)
+    profiler.after_request(session)
+    idle.set()
+    assert not profiler.active, "Session should finish after the window"
+
+    collapsed = profiler.export("collapsed")
+    assert collapsed.strip(), "No stacks sampled"
+    assert all("test_profiler.py" in line for line in collapsed.splitlines()), "Idle thread stacks were sampled"
+    print(f"✅ Sampled stacks (collapsed):\n{collapsed[:300]}")
+
+    # Step 5: Bad session options are rejected
+    for bad in ({"top": 0}, {"top": -3}, {"top": True}, {"trace_malloc": "false"}, {"trace_malloc": 1}):
+        try:
+            profiler.start(mode="cprofile", requests=1, **bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"start() accepted {bad}")
+    assert not profiler.active
+    print("✅ Invalid top / tracemalloc options rejected")
+
+    # Step 6: A request from an expired session must not end the next one
+    profiler.start(mode="sampling", seconds=0.05)
+    stale = profiler.before_request()
+    time.sleep(0.1)
+    profiler.status()  # window over -> session finishes with `stale` in flight
+    profiler.start(mode="cprofile", requests=1)
+    current = profiler.before_request()
+    profiler.after_request(stale)
+    assert profiler.active, "Stale completion finished the new session"
+    profiler.after_request(current)
+    assert not profiler.active and profiler.summary()["requests"] == 1
+    print("✅ Stale completions are ignored")
+
+    # Step 7: Middleware profiles app routes but never /admin
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append((scope["path"], profiler._session["in_flight"]))
+
+    middleware = ProfilingMiddleware(app, profiler)
+    profiler.start(mode="cprofile", requests=1)
+    asyncio.run(middleware({"type": "http", "path": "/admin/profile/status"}, None, None))
+    assert profiler.active and profiler._session["requests_seen"] == 0, "/admin request was profiled"
+    asyncio.run(middleware({"type": "http", "path": "/search"}, None, None))
+    assert seen == [("/admin/profile/status", 0), ("/search", 1)], seen
+    assert not profiler.active, "Session should finish after the /search request"
+    print("✅ Middleware skips /admin and profiles app routes")
+
+    # Step 8: Admin routes are token-guarded
+    check_admin_guard()
+
+    print("\n✅ Request profiler is functional.\n")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
-from app.embedder import load_model, embed_query, preview_embedding
-from app.vector_store import load_embeddings_json, create_faiss_index, search_faiss
+from app.embedder import load_model, embed_query, embed_queries, preview_embedding
+from app.vector_store import load_embeddings_json, create_faiss_index, search_faiss, search_faiss_batch
+from app.search import NeuronaSearchEngine
+from load_test import StubEncoder
 
 # ---- CONFIGURATION ----
 VECTOR_PATH = "data/embeddings/sample_embeddings.json"
@@ -7,7 +9,43 @@ MODEL_NAME = "mpnet"  # ✅ Match the model used during embedding
 TOP_K = 5
 # ------------------------
 
+def check_search_many():
+    """search_many across several batches with a stub model (no download)."""
+    texts = [f"chunk about topic {i}" for i in range(23)]
+    model = StubEncoder(dim=64)
+    engine = NeuronaSearchEngine.__new__(NeuronaSearchEngine)
+    engine.model = model
+    engine.metadata = [
+        {"chunk_index": i, "page_number": i % 3 + 1, "chunk_text": t} for i, t in enumerate(texts)
+    ]
+    engine.index = create_faiss_index(model.encode(texts))
+
+    # Each query is a chunk's own text, so its top hit identifies it; batch_size=4 spans 6 batches
+    queries = list(reversed(texts))
+    batched = engine.search_many(queries, top_k=3, batch_size=4)
+    assert len(batched) == len(queries), "Expected one result list per query"
+    for query, results in zip(queries, batched):
+        assert results[0]["chunk_text"] == query, "Batch results out of order"
+        assert [r["chunk_index"] for r in results] == [r["chunk_index"] for r in engine.search(query, top_k=3)]
+
+    huge = engine.search_many(queries[:2], top_k=10_000_000, batch_size=4)
+    assert all(len(results) == len(texts) for results in huge), "top_k not clamped to index size"
+
+    on_page_one = lambda r: r["page_number"] == 1
+    filtered = engine.search_many(queries, top_k=5, batch_size=4, filter_fn=on_page_one)
+    assert all(r["page_number"] == 1 for results in filtered for r in results), "filter_fn not applied"
+
+    try:
+        engine.search_many(["valid query", "   "], batch_size=1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Empty query accepted by search_many")
+    print(f"✅ search_many matches single search across {len(queries) // 4 + 1} batches")
+
 def main():
+    check_search_many()
+
     print("📂 Loading embedded memory...")
     try:
         vectors, data = load_embeddings_json(VECTOR_PATH)
@@ -41,5 +79,11 @@ def main():
         print(f"🧠 [Page {res['page_number']}] | Score: {round(res['score'], 4)}")
         print(f"Text Preview:\n{res['chunk_text'][:300]}...\n{'-'*60}")
 
+    # 📦 Batch search must match single-query search
+    batch = search_faiss_batch(embed_queries([query, query], model), index, data, top_k=TOP_K)
+    assert len(batch) == 2, "Expected one result list per query"
+    assert [r["chunk_id"] for r in batch[0]] == [r["chunk_id"] for r in results], "Batch results differ from single search"
+    print(f"✅ Batch search matches single search for {len(batch)} queries")
+
 if __name__ == "__main__":
     main()
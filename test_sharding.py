@@ -0,0 +1,72 @@
+from app.sharding import ShardedSearchEngine, assign_shards
+from app.embedder import embed_query
+from concurrent.futures import ThreadPoolExecutor
+
+# ---- CONFIG ----
+EMBED_PATH = "data/embeddings/sample_embeddings.json"
+MODEL_NAME = "mpnet"
+NUM_SHARDS = 3
+STRATEGY = "hash"  # or "document"
+TOP_K = 5
+TEST_QUERY = "What is LegitReach?"
+# ----------------
+
+def main():
+    print("🧩 [Test] Sharded Search Validation\n")
+
+    # Step 1: Shard assignment covers every chunk exactly once
+    fake_meta = [{"chunk_id": f"c{i}", "meta": {"filename": f"doc{i % 4}.pdf"}} for i in range(20)]
+    for strategy in ("document", "hash"):
+        shards = assign_shards(fake_meta, NUM_SHARDS, strategy)
+        assert sorted(i for s in shards for i in s) == list(range(20)), f"{strategy}: chunks lost or duplicated"
+    by_doc = assign_shards(fake_meta, NUM_SHARDS, "document")
+    doc_shards = {}
+    for shard_id, s in enumerate(by_doc):
+        for i in s:
+            doc_shards.setdefault(fake_meta[i]["meta"]["filename"], set()).add(shard_id)
+    assert all(len(s) == 1 for s in doc_shards.values()), f"Document split across shards: {doc_shards}"
+
+    # Chunks without a document key (no meta) fall back to hash placement
+    bare_meta = [{"chunk_id": f"c{i}", "meta": {}} for i in range(30)]
+    bare = assign_shards(bare_meta, NUM_SHARDS, "document")
+    assert bare == assign_shards(bare_meta, NUM_SHARDS, "hash"), "Missing doc key should hash"
+    assert all(bare), "Chunks without a document key all landed on one shard"
+    print("✅ Shard assignment is complete and stable")
+
+    # Step 2: Scatter-gather search across worker processes
+    with ShardedSearchEngine(MODEL_NAME, EMBED_PATH, num_shards=NUM_SHARDS, strategy=STRATEGY) as engine:
+        print(f"✅ {engine.get_index_info()}")
+        print(f"✅ Health: {engine.health()}")
+
+        results = engine.search(TEST_QUERY, top_k=TOP_K)
+        assert results, "No results returned!"
+        scores = [r["score"] for r in results]
+        assert scores == sorted(scores, reverse=True), "Results not merged by score"
+        assert not engine.last_failed_shards, f"Shards failed: {engine.last_failed_shards}"
+        assert not any("vector" in r for r in results), "Shard replies must not carry vectors"
+        assert not hasattr(engine, "metadata"), "Coordinator must not hold the corpus"
+
+        # Concurrent callers fan out in parallel and each get their own merged top-k
+        expected_ids = [r["chunk_id"] for r in results]
+        query_vector = embed_query(TEST_QUERY, engine.model)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            replies = list(pool.map(lambda _: engine.coordinator.search(query_vector.copy(), TOP_K), range(8)))
+        for concurrent_results, failed in replies:
+            assert not failed and [r["chunk_id"] for r in concurrent_results] == expected_ids, "Concurrent search mismatch"
+        print("✅ 8 concurrent searches returned identical results")
+
+        # Step 3: Kill one shard and expect partial results
+        engine.coordinator.processes[0].terminate()
+        engine.coordinator.processes[0].join()
+        partial = engine.search(TEST_QUERY, top_k=TOP_K)
+        assert engine.last_failed_shards == [0], "Dead shard not reported"
+        print(f"✅ Partial search returned {len(partial)} results with shard 0 down")
+
+        for i, r in enumerate(results, start=1):
+            print(f"\n[{i}] Score: {round(r['score'], 4)} | Page: {r['page_number']}")
+            print(f"Text: {r['chunk_text'][:250]}...\n{'-'*50}")
+
+    print("\n✅ Sharded search is functional.\n")
+
+if __name__ == "__main__":
+    main()